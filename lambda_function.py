@@ -11,25 +11,224 @@ This function coordinates between:
 import json
 import os
 import datetime
+import functools
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 
-# Import our custom modules
-from google_drive_client import GoogleDriveClient
-from telegram_client import TelegramClient
-from etf_analysis import get_etf_price, should_buy
+# orjson is optional: a much faster encoder/decoder for the internal JSON
+# handled on every invocation (webhook bodies, event logs, data snapshots)
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-# Environment variables
-ETF_TICKER = os.getenv("ETF_TICKER")
-WAIT_PERIOD_DAYS = int(os.getenv("WAIT_PERIOD_DAYS", "30"))
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-GOOGLE_SERVICE_ACCOUNT_JSON = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-GOOGLE_DRIVE_FILE_ID = os.getenv("GOOGLE_DRIVE_FILE_ID")
+# Our custom modules (google_drive_client, telegram_client, etf_analysis) are
+# imported where first used: etf_analysis pulls in yfinance/pandas, which would
+# otherwise slow down every cold start, including webhook acknowledgements
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Settings read from the Lambda environment variables (None if unset)."""
+    etf_ticker: str | None
+    wait_period_days: int
+    telegram_chat_id: str | None
+    telegram_bot_token: str | None
+    google_service_account_json: str | None
+    google_drive_file_id: str | None
+
+
+@functools.lru_cache(maxsize=1)
+def get_config():
+    """
+    Build the Config from environment variables on first use.
+    The result is cached for the lifetime of the container (the environment
+    of a Lambda container never changes) and is safe to share across threads.
+    Only call this inside a handler's try block: a malformed WAIT_PERIOD_DAYS
+    raises ValueError, which must reach the handler's error path.
+    """
+    return Config(
+        etf_ticker=os.getenv("ETF_TICKER"),
+        wait_period_days=int(os.getenv("WAIT_PERIOD_DAYS", "30")),
+        telegram_chat_id=os.getenv("TELEGRAM_CHAT_ID"),
+        telegram_bot_token=os.getenv("TELEGRAM_BOT_TOKEN"),
+        google_service_account_json=os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON"),
+        google_drive_file_id=os.getenv("GOOGLE_DRIVE_FILE_ID")
+    )
+
+
+# Event key used when this Lambda re-invokes itself to process a Telegram command
+ASYNC_COMMAND_KEY = "stockmate_telegram_update"
+
+# Clients are created on first use and reused across warm invocations,
+# so their HTTP connections and credentials survive between runs
+_LAMBDA_CLIENT = None
+_GDRIVE = None
+_TELEGRAM = None
+
+# Telegram update_ids already processed by this container (bounded). Asynchronous
+# invocations are delivered at least once, so a retried or re-delivered update
+# that lands on the same container is skipped instead of being applied twice
+_PROCESSED_UPDATE_IDS = collections.deque(maxlen=100)
+
+# ETF prices already fetched by this container, keyed by (ticker, date string)
+_PRICE_CACHE = {}
+
+
+def _orjson_default(obj):
+    """
+    Fallback for values orjson rejects but json.dumps accepts, such as
+    float/int subclasses (e.g. numpy.float64 prices from yfinance).
+    """
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dumps(obj, sort_keys=False):
+    """
+    Serialize obj to a compact JSON string, using orjson when available.
+    Responses shown to users/callers keep using json.dumps for stable formatting.
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=_orjson_default, option=option).decode("utf-8")
+    return json.dumps(obj, sort_keys=sort_keys)
+
+
+def _dumps_bytes(obj):
+    """Serialize obj to compact UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(s):
+    """Parse a JSON string or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def _get_telegram_client():
+    """Return the cached TelegramClient, creating it on first use."""
+    global _TELEGRAM
+    if _TELEGRAM is None:
+        from telegram_client import TelegramClient
+        config = get_config()
+        _TELEGRAM = TelegramClient(config.telegram_bot_token, config.telegram_chat_id)
+    return _TELEGRAM
+
+
+def _get_clients():
+    """Return the cached (GoogleDriveClient, TelegramClient) pair, creating them on first use."""
+    global _GDRIVE
+    if _GDRIVE is None:
+        from google_drive_client import GoogleDriveClient
+        config = get_config()
+        _GDRIVE = GoogleDriveClient(config.google_service_account_json, config.google_drive_file_id)
+    return _GDRIVE, _get_telegram_client()
+
+
+def _get_etf_price_cached(ticker, date_str):
+    """
+    Get the ETF price, reusing a price this container already fetched for the same day.
+    Failed fetches are not cached, so the next invocation tries Yahoo Finance again.
+    """
+    key = (ticker, date_str)
+    if key in _PRICE_CACHE:
+        print(f"Using cached {ticker} price for {date_str}")
+        return _PRICE_CACHE[key]
+    
+    from etf_analysis import get_etf_price
+    
+    price = get_etf_price(ticker)
+    if price is not None:
+        # yfinance can return numpy.float64 - store/return a plain float
+        price = float(price)
+        # Only today's price is ever needed - drop entries from previous days
+        _PRICE_CACHE.clear()
+        _PRICE_CACHE[key] = price
+    return price
+
+
+def _dispatch_command_async(telegram_update, context):
+    """
+    Re-invoke this Lambda asynchronously with the parsed Telegram update,
+    so the webhook can be acknowledged before the command is processed.
+    Returns True if the invocation was queued, False to process inline.
+    """
+    global _LAMBDA_CLIENT
+    
+    # Only possible when running on Lambda (local testing passes context=None)
+    function_arn = getattr(context, "invoked_function_arn", None)
+    if not function_arn:
+        return False
+    
+    try:
+        if _LAMBDA_CLIENT is None:
+            import boto3  # Bundled with the Lambda Python runtime
+            _LAMBDA_CLIENT = boto3.client("lambda")
+        
+        _LAMBDA_CLIENT.invoke(
+            FunctionName=function_arn,
+            InvocationType="Event",
+            Payload=_dumps_bytes({ASYNC_COMMAND_KEY: telegram_update})
+        )
+        return True
+    except Exception as e:
+        print(f"⚠️ Async dispatch failed, processing command inline: {str(e)}")
+        return False
+
+
+def process_telegram_command(telegram_update):
+    """
+    Process a parsed Telegram update and reply to the user.
+    Runs in the asynchronous invocation queued by handle_telegram_command,
+    or inline if that invocation could not be queued.
+    """
+    try:
+        # Skip updates this container has already handled (at-least-once delivery)
+        update_id = telegram_update.get("update_id")
+        if update_id is not None:
+            if update_id in _PROCESSED_UPDATE_IDS:
+                print(f"Skipping already processed Telegram update {update_id}")
+                return {"ok": True, "duplicate": True}
+            _PROCESSED_UPDATE_IDS.append(update_id)
+        
+        # Get clients (reused across warm invocations)
+        gdrive, telegram = _get_clients()
+        
+        # Process the command
+        success, response = telegram.process_command(telegram_update, gdrive, get_config().wait_period_days)
+        
+        # Send response to user
+        telegram.send_message(response)
+        
+        return {"ok": True}
+        
+    except Exception as e:
+        error_msg = f"Error in telegram command handler: {str(e)}"
+        print(error_msg)
+        try:
+            telegram = _get_telegram_client()
+            telegram.send_message(f"❌ Error: {str(e)}")
+        except:
+            pass
+        return {"ok": True, "error": str(e)}
 
 
 def handle_telegram_command(event, context):
     """
     Handle Telegram bot commands: /deposit, /bought, /status
     Triggered by Telegram webhook when user sends a message to the bot.
+    
+    The webhook is acknowledged immediately and the command is processed in
+    an asynchronous invocation, so slow Google Drive or Yahoo Finance calls
+    never make Telegram time out and re-deliver the update.
     """
     try:
         print(f"Received Telegram webhook event")
@@ -40,45 +239,36 @@ def handle_telegram_command(event, context):
         # If using Lambda Function URL, body is a JSON string
         if "body" in event and isinstance(event.get("body"), str):
             print("📦 Detected Lambda Function URL format - parsing body")
-            telegram_update = json.loads(event["body"])
+            telegram_update = _loads(event["body"])
         
-        print(f"Telegram update: {json.dumps(telegram_update)[:300]}...")
+        print(f"Telegram update: {_dumps(telegram_update)[:300]}...")
         
-        # Initialize clients
-        gdrive = GoogleDriveClient(GOOGLE_SERVICE_ACCOUNT_JSON, GOOGLE_DRIVE_FILE_ID)
-        telegram = TelegramClient(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
-        
-        # Process the command
-        success, response = telegram.process_command(telegram_update, gdrive, WAIT_PERIOD_DAYS)
-        
-        # Send response to user
-        telegram.send_message(response)
-        
-        # Return success to Telegram (required for webhook)
-        # Format for Lambda Function URL
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Content-Type": "application/json"
-            },
-            "body": json.dumps({"ok": True})
-        }
+        # Hand the command off, or process it now if that is not possible
+        if _dispatch_command_async(telegram_update, context):
+            print("📨 Command queued for asynchronous processing")
+            result = {"ok": True}
+        else:
+            result = process_telegram_command(telegram_update)
         
     except Exception as e:
         error_msg = f"Error in telegram command handler: {str(e)}"
         print(error_msg)
         try:
-            telegram = TelegramClient(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
+            telegram = _get_telegram_client()
             telegram.send_message(f"❌ Error: {str(e)}")
         except:
             pass
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Content-Type": "application/json"
-            },
-            "body": json.dumps({"ok": True, "error": str(e)})
-        }
+        result = {"ok": True, "error": str(e)}
+    
+    # Return success to Telegram (required for webhook)
+    # Format for Lambda Function URL
+    return {
+        "statusCode": 200,
+        "headers": {
+            "Content-Type": "application/json"
+        },
+        "body": json.dumps(result)
+    }
 
 
 def handle_scheduled_check(event, context):
@@ -87,16 +277,25 @@ def handle_scheduled_check(event, context):
     This function runs daily to check ETF prices and determine if it's time to buy.
     """
     try:
-        print(f"Starting scheduled ETF check for {ETF_TICKER} at {datetime.datetime.now()}")
+        config = get_config()
+        
+        # Read the clock once so every step of this run agrees on "today"
+        now = datetime.datetime.now()
+        today = now.date()
+        today_str = today.isoformat()
+        
+        print(f"Starting scheduled ETF check for {config.etf_ticker} at {now}")
         
-        # Initialize clients
-        gdrive = GoogleDriveClient(GOOGLE_SERVICE_ACCOUNT_JSON, GOOGLE_DRIVE_FILE_ID)
-        telegram = TelegramClient(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
+        # Get clients (reused across warm invocations)
+        gdrive, telegram = _get_clients()
         
         # Load data from Google Drive
         print("Loading data from Google Drive...")
         data = gdrive.read_file()
         
+        # Snapshot the loaded data so an unchanged file is not written back
+        original_snapshot = _dumps(data, sort_keys=True)
+        
         # Ensure status field exists (backward compatibility)
         if "status" not in data:
             data["status"] = "active"
@@ -115,9 +314,9 @@ def handle_scheduled_check(event, context):
         
         print("✅ Status is ACTIVE - proceeding with check")
         
-        # Get current ETF price
-        print(f"Fetching current price for {ETF_TICKER}...")
-        current_price = get_etf_price(ETF_TICKER)
+        # Get current ETF price (once per day per warm container)
+        print(f"Fetching current price for {config.etf_ticker}...")
+        current_price = _get_etf_price_cached(config.etf_ticker, today_str)
         
         if current_price is None:
             error_msg = "Error: Could not fetch ETF price."
@@ -129,19 +328,19 @@ def handle_scheduled_check(event, context):
             }
         
         # Update today's price
-        today_str = str(datetime.date.today())
         data["tracked_prices"][today_str] = current_price
         
-        # Keep only last 30 days of prices
-        if len(data["tracked_prices"]) > 30:
-            oldest_date = min(data["tracked_prices"])
-            data["tracked_prices"].pop(oldest_date)
+        # Keep only last 30 days of prices (ISO date keys sort chronologically;
+        # min() does not rely on the stored order, which may be hand-edited)
+        while len(data["tracked_prices"]) > 30:
+            data["tracked_prices"].pop(min(data["tracked_prices"]))
         
-        print(f"Today's {ETF_TICKER} price: {current_price}")
+        print(f"Today's {config.etf_ticker} price: {current_price}")
         
         # Determine if we should buy
-        buy_now, reason = should_buy(data, current_price, WAIT_PERIOD_DAYS)
-        print(f"[{datetime.date.today()}] {reason}")
+        from etf_analysis import should_buy
+        buy_now, reason = should_buy(data, current_price, config.wait_period_days)
+        print(f"[{today}] {reason}")
         
         # Prepare message with emoji
         if buy_now:
@@ -151,12 +350,27 @@ def handle_scheduled_check(event, context):
             message = f"⏳ WAIT\n\n{reason}"
             data["last_action"] = "Waiting"
         
-        # Send Telegram notification
-        telegram.send_message(message)
-        
-        # Save updated data to Google Drive
-        print("Saving data to Google Drive...")
-        gdrive.write_file(data)
+        if _dumps(data, sort_keys=True) == original_snapshot:
+            # Same price and action as the stored data - the Drive write would be a no-op
+            print("No changes to persist - skipping Drive write")
+            telegram.send_message(message)
+        else:
+            # Send Telegram notification and save updated data to Google Drive
+            # concurrently - the two calls are independent network round-trips
+            print("Sending notification and saving data to Google Drive...")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                send_future = executor.submit(telegram.send_message, message)
+                write_future = executor.submit(gdrive.write_file, data)
+                wait([send_future, write_future])
+            
+            # Log every failure before raising, so a failed Drive save is never
+            # hidden behind a failed Telegram send (the Drive error wins)
+            if send_future.exception() is not None:
+                print(f"Error sending Telegram notification: {str(send_future.exception())}")
+            if write_future.exception() is not None:
+                print(f"Error saving data to Google Drive: {str(write_future.exception())}")
+                raise write_future.exception()
+            send_future.result()
         
         print("ETF check completed successfully")
         
@@ -164,7 +378,7 @@ def handle_scheduled_check(event, context):
             'statusCode': 200,
             'body': json.dumps({
                 'message': 'ETF check completed',
-                'ticker': ETF_TICKER,
+                'ticker': config.etf_ticker,
                 'price': current_price,
                 'buy_signal': buy_now,
                 'reason': reason
@@ -177,7 +391,7 @@ def handle_scheduled_check(event, context):
         
         # Try to send error notification
         try:
-            telegram = TelegramClient(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
+            telegram = _get_telegram_client()
             telegram.send_message(f"❌ Lambda Error: {str(e)}")
         except:
             pass
@@ -188,30 +402,53 @@ def handle_scheduled_check(event, context):
         }
 
 
+def handle_queued_command(event, context):
+    """
+    Handle a Telegram command queued by handle_telegram_command
+    (asynchronous self-invocation carrying the parsed update).
+    """
+    return process_telegram_command(event[ASYNC_COMMAND_KEY])
+
+
+def _classify_trigger(event):
+    """
+    Return the trigger kind of an event: "queued_command", "webhook" or "scheduled".
+    """
+    # Queued Telegram command (asynchronous self-invocation) - checked first
+    if ASYNC_COMMAND_KEY in event:
+        return "queued_command"
+    # Lambda Function URL (has "body" field) or direct Telegram webhook (API Gateway format)
+    if "body" in event or "message" in event or "callback_query" in event:
+        return "webhook"
+    # Triggered by EventBridge or manual test
+    return "scheduled"
+
+
+# Trigger kind -> (handler, log message)
+_DISPATCH = {
+    "queued_command": (handle_queued_command, "📨 Detected: Queued Telegram command"),
+    "webhook": (handle_telegram_command, "🤖 Detected: Telegram webhook"),
+    "scheduled": (handle_scheduled_check, "⏰ Detected: Scheduled check trigger"),
+}
+
+
 def lambda_handler(event, context):
     """
     Main Lambda handler - routes to appropriate function based on trigger type.
     
-    Supports two trigger types:
+    Supports three trigger types:
     1. EventBridge (scheduled) - Daily ETF price checking
     2. Telegram Webhook - Bot commands (/deposit, /bought, /status)
+    3. Asynchronous self-invocation - Processing of a queued bot command
     """
-    print(f"Lambda invoked with event: {json.dumps(event)[:500]}...")
+    # Serializing the whole event is only worth it when debugging
+    # (read directly - routing must not depend on the rest of the config being valid)
+    if os.getenv("DEBUG"):
+        print(f"Lambda invoked with event: {_dumps(event)[:500]}...")
     
-    # Detect trigger type
-    # Check for Lambda Function URL (has "body" field) or direct Telegram webhook
-    if "body" in event:
-        # Lambda Function URL format
-        print("🤖 Detected: Telegram webhook via Function URL")
-        return handle_telegram_command(event, context)
-    elif "message" in event or "callback_query" in event:
-        # Direct Telegram webhook (API Gateway format)
-        print("🤖 Detected: Telegram webhook (direct)")
-        return handle_telegram_command(event, context)
-    else:
-        # Triggered by EventBridge or manual test
-        print("⏰ Detected: Scheduled check trigger")
-        return handle_scheduled_check(event, context)
+    handler, detected_msg = _DISPATCH[_classify_trigger(event)]
+    print(detected_msg)
+    return handler(event, context)
 
 
 # For local testing